@@ -2,19 +2,23 @@
 Database Helper Functions
 
 MongoDB helper functions ready to use in your backend code.
-Import and use these functions in your API endpoints for database operations.
+Import and await these coroutines in your (async) API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _client = None
 db = None
 
@@ -22,34 +26,99 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(database_url)
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+def to_document(model: BaseModel) -> dict:
+    """Dump a model for storage: dates as ISO strings (BSON has no date-only type), None fields omitted"""
+    return model.model_dump(mode="json", exclude_none=True)
+
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
-        data_dict = data.model_dump()
+        data_dict = to_document(data)
     else:
         data_dict = data.copy()
 
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection_name: str, items: List[Union[BaseModel, dict]]):
+    """Insert many documents with timestamps in one round-trip"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    if not items:
+        return []
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in items:
+        data_dict = to_document(data) if isinstance(data, BaseModel) else data.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    # Unordered lets the server apply the batch without stopping at the first failure
+    result = await db[collection_name].insert_many(docs, ordered=False)
+    return [str(i) for i in result.inserted_ids]
+
+def find_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Open a cursor over a collection for streaming; the driver picks batch sizes"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = db[collection_name].find(filter_dict or {}, projection)
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return cursor
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Get documents from collection, optionally restricted to projected fields"""
+    cursor = find_documents(collection_name, filter_dict, limit, projection)
+    return await cursor.to_list(length=None)
+
+async def aggregate_last_bred(collection_name: str):
+    """Most recent breeding date per doe, grouped server-side"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    # $sort + $first on the {doe_tag, date_bred} index lets Mongo use a DISTINCT_SCAN
+    return await db[collection_name].aggregate([
+        {"$sort": {"doe_tag": 1, "date_bred": -1}},
+        {"$group": {"_id": "$doe_tag", "last": {"$first": "$date_bred"}}},
+    ]).to_list(length=None)
+
+# Indexes backing the API's filters: (collection, keys, options)
+_INDEXES = [
+    ("rabbit", [("tag", 1)], {"unique": True}),
+    ("rabbit", [("sex", 1), ("status", 1)], {}),
+    ("healthrecord", [("rabbit_tag", 1)], {}),
+    ("breeding", [("doe_tag", 1), ("date_bred", -1)], {}),
+    ("breeding", [("buck_tag", 1)], {}),
+    ("litter", [("doe_tag", 1), ("kindling_date", -1)], {}),
+    ("medicationschedule", [("rabbit_tag", 1), ("start_date", 1), ("end_date", 1)], {}),
+    ("task", [("status", 1), ("assigned_to", 1)], {}),
+]
+
+async def ensure_indexes():
+    """Create indexes backing the API's common filters (idempotent)"""
+    if db is None:
+        return
+
+    # Log failures per index so one bad index (e.g. unique tag) doesn't hide the others
+    results = await asyncio.gather(
+        *(db[coll].create_index(keys, **opts) for coll, keys, opts in _INDEXES),
+        return_exceptions=True,
+    )
+    for (coll, keys, _), result in zip(_INDEXES, results):
+        if isinstance(result, Exception):
+            logger.error("Could not create index %s on %r: %s", keys, coll, result)
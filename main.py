@@ -1,15 +1,44 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Type
 
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+from fastapi import Body, FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from database import create_document, get_documents, db
+from database import aggregate_last_bred, create_document, create_documents, ensure_indexes, find_documents, get_documents, to_document, db
 import schemas as app_schemas
 
-app = FastAPI(title="Rabbitry Farm Management API")
+
+def _dumps(content: Any) -> bytes:
+    # ObjectId and other BSON types fall back to str. Naive Mongo datetimes are
+    # UTC, and OPT_NAIVE_UTC says so on the wire: stored created_at/updated_at
+    # serialize as "...+00:00" rather than the old naive ISO form.
+    return orjson.dumps(content, default=str, option=orjson.OPT_NAIVE_UTC)
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """orjson response that also handles Mongo types; return it directly to skip jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Indexes only speed up queries; build them in the background so an
+    # unreachable Mongo doesn't hold up startup. Failures are logged.
+    index_task = asyncio.create_task(ensure_indexes())
+    yield
+    index_task.cancel()
+
+
+app = FastAPI(title="Rabbitry Farm Management API", default_response_class=MongoJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,18 +51,96 @@ app.add_middleware(
 
 # ---------- Utility ----------
 
-def collection_name(model_cls: Type[BaseModel]) -> str:
-    return model_cls.__name__.lower()
+# Collection name is the lowercased model name; resolve it once per schema
+_COLL: Dict[Type[BaseModel], str] = {
+    cls: cls.__name__.lower()
+    for cls in (
+        app_schemas.Rabbit,
+        app_schemas.HealthRecord,
+        app_schemas.Breeding,
+        app_schemas.Litter,
+        app_schemas.MedicationSchedule,
+        app_schemas.Task,
+    )
+}
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Coerce a stored date (date, datetime or ISO string) without try/except"""
+    if type(value) is date:
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return None
+
+
+_STREAM_FLUSH_BYTES = 64 * 1024
+
+
+async def _iter_json_array(first: Dict[str, Any], cursor) -> AsyncIterator[bytes]:
+    buf = bytearray(b"[")
+    buf += _dumps(first)
+    async for doc in cursor:
+        buf += b","
+        buf += _dumps(doc)
+        if len(buf) >= _STREAM_FLUSH_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    buf += b"]"
+    yield bytes(buf)
+
+
+async def stream_documents(cursor) -> Response:
+    """Stream a Mongo cursor as a JSON array"""
+    # Fetch the first document before the 200 is sent so query errors still surface
+    try:
+        first = await anext(cursor)
+    except StopAsyncIteration:
+        return Response(content=b"[]", media_type="application/json")
+    return StreamingResponse(_iter_json_array(first, cursor), media_type="application/json")
+
+
+_FIELDS_QUERY = Query(None, description="Comma-separated fields to return (default: all)")
 
+# Fields every stored document carries besides its schema fields
+_DOCUMENT_FIELDS = frozenset({"_id", "created_at", "updated_at"})
 
-def to_dict_list(docs: List[Dict[str, Any]]):
-    out = []
-    for d in docs:
-        d = dict(d)
-        if "_id" in d:
-            d["_id"] = str(d["_id"])  # stringify ObjectId
-        out.append(d)
-    return out
+
+def parse_fields(fields: Optional[str], model_cls: Type[BaseModel]) -> Optional[Dict[str, int]]:
+    """Turn a comma-separated ?fields= value into a Mongo projection (422 on unknown fields)"""
+    if not fields:
+        return None
+    names = [f for f in (part.strip() for part in fields.split(",")) if f]
+    unknown = [f for f in names if f not in model_cls.model_fields and f not in _DOCUMENT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields for {model_cls.__name__}: {', '.join(unknown)}")
+    return {f: 1 for f in names} or None
+
+
+# Bulk payloads are capped like list limits; larger imports can be split client-side
+_BULK_MAX_ITEMS = 200
+_BULK_BODY = Body(..., max_length=_BULK_MAX_ITEMS)
+
+
+async def create_bulk(model_cls: Type[BaseModel], payload: List[BaseModel], unique_key: Optional[str] = None) -> List[str]:
+    """Insert a validated batch, reporting partial writes if some documents fail"""
+    try:
+        return await create_documents(_COLL[model_cls], [to_document(p) for p in payload])
+    except BulkWriteError as e:
+        # Unordered insert: documents without errors were still written
+        errors = e.details.get("writeErrors", [])
+        duplicates = [err for err in errors if err.get("code") == 11000]
+        detail: Dict[str, Any] = {
+            "message": f"{len(errors)} of {len(payload)} {model_cls.__name__} documents could not be inserted",
+            "inserted_count": e.details.get("nInserted", 0),
+            "errors": [{"index": err.get("index"), "code": err.get("code"), "message": err.get("errmsg")} for err in errors],
+        }
+        if unique_key and duplicates:
+            detail[f"duplicate_{unique_key}s"] = [err["op"].get(unique_key) for err in duplicates]
+        status_code = 409 if errors and len(duplicates) == len(errors) else 500
+        raise HTTPException(status_code=status_code, detail=detail)
 
 
 def parse_date_safe(value: Optional[str]) -> Optional[date]:
@@ -41,7 +148,7 @@ def parse_date_safe(value: Optional[str]) -> Optional[date]:
         return None
     try:
         return date.fromisoformat(value)
-    except Exception:
+    except ValueError:
         return None
 
 
@@ -53,7 +160,7 @@ def read_root():
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -67,7 +174,7 @@ def test_database():
             response["database"] = "✅ Available"
             response["connection_status"] = "Connected"
             try:
-                response["collections"] = db.list_collection_names()
+                response["collections"] = await db.list_collection_names()
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️ Connected but Error: {str(e)[:80]}"
@@ -80,12 +187,9 @@ def test_database():
 
 # ---------- Schema Endpoint ----------
 
-@app.get("/schema")
-def get_schema():
-    """Expose Pydantic model schemas for tooling/validation"""
+def _build_schema_cache() -> Dict[str, Any]:
     result: Dict[str, Any] = {}
-    for name in dir(app_schemas):
-        attr = getattr(app_schemas, name)
+    for name, attr in vars(app_schemas).items():
         if isinstance(attr, type) and issubclass(attr, BaseModel) and attr is not BaseModel:
             try:
                 result[name] = attr.model_json_schema()
@@ -95,17 +199,37 @@ def get_schema():
     return result
 
 
+# Schemas are static for the life of the process; build and encode them once
+_SCHEMA_CACHE = _build_schema_cache()
+_SCHEMA_CACHE_BYTES = orjson.dumps(_SCHEMA_CACHE)
+
+
+@app.get("/schema")
+def get_schema():
+    """Expose Pydantic model schemas for tooling/validation"""
+    return Response(content=_SCHEMA_CACHE_BYTES, media_type="application/json")
+
+
 # ---------- Core CRUD Endpoints ----------
 
 # Rabbits
 @app.post("/rabbits")
-def create_rabbit(payload: app_schemas.Rabbit):
-    rid = create_document(collection_name(app_schemas.Rabbit), payload)
+async def create_rabbit(payload: app_schemas.Rabbit):
+    try:
+        rid = await create_document(_COLL[app_schemas.Rabbit], to_document(payload))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Rabbit with tag {payload.tag!r} already exists")
     return {"id": rid}
 
 
+@app.post("/rabbits/bulk")
+async def create_rabbits_bulk(payload: List[app_schemas.Rabbit] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.Rabbit, payload, unique_key="tag")
+    return {"ids": ids}
+
+
 @app.get("/rabbits")
-def list_rabbits(tag: Optional[str] = None, sex: Optional[str] = None, status: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_rabbits(tag: Optional[str] = None, sex: Optional[str] = None, status: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if tag:
         filt["tag"] = tag
@@ -113,35 +237,45 @@ def list_rabbits(tag: Optional[str] = None, sex: Optional[str] = None, status: O
         filt["sex"] = sex
     if status:
         filt["status"] = status
-    docs = get_documents(collection_name(app_schemas.Rabbit), filt, limit)
-    return to_dict_list(docs)
+    return await stream_documents(find_documents(_COLL[app_schemas.Rabbit], filt, limit, parse_fields(fields, app_schemas.Rabbit)))
 
 
 # Health Records
 @app.post("/health")
-def create_health_record(payload: app_schemas.HealthRecord):
-    hid = create_document(collection_name(app_schemas.HealthRecord), payload)
+async def create_health_record(payload: app_schemas.HealthRecord):
+    hid = await create_document(_COLL[app_schemas.HealthRecord], to_document(payload))
     return {"id": hid}
 
 
+@app.post("/health/bulk")
+async def create_health_records_bulk(payload: List[app_schemas.HealthRecord] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.HealthRecord, payload)
+    return {"ids": ids}
+
+
 @app.get("/health")
-def list_health_records(rabbit_tag: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_health_records(rabbit_tag: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if rabbit_tag:
         filt["rabbit_tag"] = rabbit_tag
-    docs = get_documents(collection_name(app_schemas.HealthRecord), filt, limit)
-    return to_dict_list(docs)
+    return await stream_documents(find_documents(_COLL[app_schemas.HealthRecord], filt, limit, parse_fields(fields, app_schemas.HealthRecord)))
 
 
 # Breeding events
 @app.post("/breedings")
-def create_breeding(payload: app_schemas.Breeding):
-    bid = create_document(collection_name(app_schemas.Breeding), payload)
+async def create_breeding(payload: app_schemas.Breeding):
+    bid = await create_document(_COLL[app_schemas.Breeding], to_document(payload))
     return {"id": bid}
 
 
+@app.post("/breedings/bulk")
+async def create_breedings_bulk(payload: List[app_schemas.Breeding] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.Breeding, payload)
+    return {"ids": ids}
+
+
 @app.get("/breedings")
-def list_breedings(doe_tag: Optional[str] = None, buck_tag: Optional[str] = None, outcome: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_breedings(doe_tag: Optional[str] = None, buck_tag: Optional[str] = None, outcome: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if doe_tag:
         filt["doe_tag"] = doe_tag
@@ -149,151 +283,167 @@ def list_breedings(doe_tag: Optional[str] = None, buck_tag: Optional[str] = None
         filt["buck_tag"] = buck_tag
     if outcome:
         filt["outcome"] = outcome
-    docs = get_documents(collection_name(app_schemas.Breeding), filt, limit)
-    return to_dict_list(docs)
+    return await stream_documents(find_documents(_COLL[app_schemas.Breeding], filt, limit, parse_fields(fields, app_schemas.Breeding)))
 
 
 # Litters
 @app.post("/litters")
-def create_litter(payload: app_schemas.Litter):
-    lid = create_document(collection_name(app_schemas.Litter), payload)
+async def create_litter(payload: app_schemas.Litter):
+    lid = await create_document(_COLL[app_schemas.Litter], to_document(payload))
     return {"id": lid}
 
 
+@app.post("/litters/bulk")
+async def create_litters_bulk(payload: List[app_schemas.Litter] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.Litter, payload)
+    return {"ids": ids}
+
+
 @app.get("/litters")
-def list_litters(doe_tag: Optional[str] = None, kindling_date: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_litters(doe_tag: Optional[str] = None, kindling_date: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if doe_tag:
         filt["doe_tag"] = doe_tag
     kd = parse_date_safe(kindling_date)
     if kd:
-        filt["kindling_date"] = kd
-    docs = get_documents(collection_name(app_schemas.Litter), filt, limit)
-    return to_dict_list(docs)
+        filt["kindling_date"] = kd.isoformat()
+    return await stream_documents(find_documents(_COLL[app_schemas.Litter], filt, limit, parse_fields(fields, app_schemas.Litter)))
 
 
 # Medication schedules
 @app.post("/medication")
-def create_medication(payload: app_schemas.MedicationSchedule):
-    mid = create_document(collection_name(app_schemas.MedicationSchedule), payload)
+async def create_medication(payload: app_schemas.MedicationSchedule):
+    mid = await create_document(_COLL[app_schemas.MedicationSchedule], to_document(payload))
     return {"id": mid}
 
 
+@app.post("/medication/bulk")
+async def create_medication_bulk(payload: List[app_schemas.MedicationSchedule] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.MedicationSchedule, payload)
+    return {"ids": ids}
+
+
 @app.get("/medication")
-def list_medication(rabbit_tag: Optional[str] = None, active_only: bool = False, today: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_medication(rabbit_tag: Optional[str] = None, active_only: bool = False, today: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if rabbit_tag:
         filt["rabbit_tag"] = rabbit_tag
-    docs = get_documents(collection_name(app_schemas.MedicationSchedule), filt, limit)
-    records = to_dict_list(docs)
     if active_only:
-        today_date = parse_date_safe(today) or date.today()
-        active = []
-        for r in records:
-            sd = date.fromisoformat(str(r.get("start_date"))) if r.get("start_date") else None
-            ed = None
-            if r.get("end_date"):
-                try:
-                    ed = date.fromisoformat(str(r.get("end_date")))
-                except Exception:
-                    ed = None
-            if sd and sd <= today_date and (ed is None or today_date <= ed):
-                active.append(r)
-        return active
-    return records
+        # to_document() writes dates as ISO strings, which compare in calendar order
+        today_iso = (parse_date_safe(today) or date.today()).isoformat()
+        filt["start_date"] = {"$lte": today_iso}
+        filt["$or"] = [{"end_date": None}, {"end_date": {"$gte": today_iso}}]
+    return await stream_documents(find_documents(_COLL[app_schemas.MedicationSchedule], filt, limit, parse_fields(fields, app_schemas.MedicationSchedule)))
 
 
 # Tasks
 @app.post("/tasks")
-def create_task(payload: app_schemas.Task):
-    tid = create_document(collection_name(app_schemas.Task), payload)
+async def create_task(payload: app_schemas.Task):
+    tid = await create_document(_COLL[app_schemas.Task], to_document(payload))
     return {"id": tid}
 
 
+@app.post("/tasks/bulk")
+async def create_tasks_bulk(payload: List[app_schemas.Task] = _BULK_BODY):
+    ids = await create_bulk(app_schemas.Task, payload)
+    return {"ids": ids}
+
+
 @app.get("/tasks")
-def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200)):
+async def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=200), fields: Optional[str] = _FIELDS_QUERY):
     filt: Dict[str, Any] = {}
     if status:
         filt["status"] = status
     if assigned_to:
         filt["assigned_to"] = assigned_to
-    docs = get_documents(collection_name(app_schemas.Task), filt, limit)
-    return to_dict_list(docs)
+    return await stream_documents(find_documents(_COLL[app_schemas.Task], filt, limit, parse_fields(fields, app_schemas.Task)))
 
 
 # ---------- Agents ----------
 
 # Breeding Planner Agent
 @app.post("/agents/breeding/plan")
-def breeding_plan(params: app_schemas.BreedingPlanInput):
-    rabbits = to_dict_list(get_documents(collection_name(app_schemas.Rabbit)))
+async def breeding_plan(params: app_schemas.BreedingPlanInput):
+    # Only active animals are candidates; let Mongo filter and trim the fields
+    active = {"$in": ["active", None]}  # missing status defaults to active
+    projection = {"_id": 0, "tag": 1, "dob": 1, "sire_tag": 1, "dam_tag": 1}
+    # Independent queries; overlap their round-trips
+    does, bucks, last_bred_rows = await asyncio.gather(
+        get_documents(_COLL[app_schemas.Rabbit], {"sex": "doe", "status": active}, projection=projection),
+        get_documents(_COLL[app_schemas.Rabbit], {"sex": "buck", "status": active}, projection=projection),
+        aggregate_last_bred(_COLL[app_schemas.Breeding]),
+    )
+
+    today = date.today()
 
     def age_in_days(r: Dict[str, Any]) -> Optional[int]:
-        dob = r.get("dob")
-        if not dob:
-            return None
-        try:
-            # DOB may already be a date or string
-            if isinstance(dob, date):
-                d = dob
-            else:
-                d = date.fromisoformat(str(dob))
-            return (date.today() - d).days
-        except Exception:
+        d = _as_date(r.get("dob"))
+        if d is None:
             return None
-
-    does = [r for r in rabbits if r.get("sex") == "doe" and r.get("status", "active") == "active"]
-    bucks = [r for r in rabbits if r.get("sex") == "buck" and r.get("status", "active") == "active"]
+        return (today - d).days
 
     # Index recent breedings to respect cooldown by doe
-    breedings = to_dict_list(get_documents(collection_name(app_schemas.Breeding)))
     last_bred: Dict[str, date] = {}
-    for b in breedings:
-        doe = b.get("doe_tag")
-        dt = b.get("date_bred")
-        if doe and dt:
-            try:
-                d = dt if isinstance(dt, date) else date.fromisoformat(str(dt))
-                if doe not in last_bred or d > last_bred[doe]:
-                    last_bred[doe] = d
-            except Exception:
-                pass
+    for row in last_bred_rows:
+        d = _as_date(row["last"])
+        if row["_id"] and d is not None:
+            last_bred[row["_id"]] = d
+
+    # Buck eligibility doesn't depend on the doe; resolve it once up front
+    eligible_bucks = [
+        b for b in bucks
+        if (ba := age_in_days(b)) is None or ba >= params.min_buck_age_days
+    ]
+    # Parallel arrays so the pairing loop indexes lists instead of dicts
+    buck_tags = [b.get("tag") for b in eligible_bucks]
+    buck_sires = [b.get("sire_tag") for b in eligible_bucks]
+    buck_dams = [b.get("dam_tag") for b in eligible_bucks]
+    exp_kindling = (today + timedelta(days=31)).isoformat()
+
+    def find_buck(doe_tag: Optional[str], forbidden: set, skip: set) -> Optional[str]:
+        # first eligible buck that isn't a relative of (or the same animal as) the doe
+        return next(
+            (
+                bt for bt, bs, bd in zip(buck_tags, buck_sires, buck_dams)
+                if bt not in forbidden and bt not in skip and doe_tag != bs and doe_tag != bd
+            ),
+            None,
+        )
 
     suggested_pairs: List[Dict[str, Any]] = []
+    used_bucks: set = set()
     for doe in does:
         doe_age = age_in_days(doe)
         if doe_age is not None and doe_age < params.min_doe_age_days:
             continue
+        doe_tag = doe.get("tag")
         # cooldown
-        lb = last_bred.get(doe.get("tag"))
-        if lb and (date.today() - lb).days < params.cooldown_days:
+        lb = last_bred.get(doe_tag)
+        if lb and (today - lb).days < params.cooldown_days:
             continue
-        # find compatible buck
-        for buck in bucks:
-            buck_age = age_in_days(buck)
-            if buck_age is not None and buck_age < params.min_buck_age_days:
-                continue
-            # avoid pairing immediate relatives and same tag
-            if buck.get("tag") == doe.get("tag"):
-                continue
-            if buck.get("tag") in {doe.get("sire_tag"), doe.get("dam_tag")}:
-                continue
-            if doe.get("tag") in {buck.get("sire_tag"), buck.get("dam_tag")}:
-                continue
-            exp_kindling = date.today() + timedelta(days=31)
-            suggested_pairs.append({
-                "doe_tag": doe.get("tag"),
-                "buck_tag": buck.get("tag"),
-                "reason": "Meets age and cooldown; not closely related",
-                "expected_kindling": exp_kindling.isoformat(),
-            })
-            break  # one buck per doe in plan
+        # avoid pairing immediate relatives and same tag
+        forbidden = {doe_tag, doe.get("sire_tag"), doe.get("dam_tag")}
+        # find compatible buck (one per doe), preferring bucks not yet in the plan
+        buck_tag = find_buck(doe_tag, forbidden, used_bucks)
+        if buck_tag is None and used_bucks:
+            # every compatible buck already has a doe; start another round
+            used_bucks.clear()
+            buck_tag = find_buck(doe_tag, forbidden, used_bucks)
+        if buck_tag is None:
+            continue
+        used_bucks.add(buck_tag)
+        suggested_pairs.append({
+            "doe_tag": doe_tag,
+            "buck_tag": buck_tag,
+            "reason": "Meets age and cooldown; not closely related",
+            "expected_kindling": exp_kindling,
+        })
 
     # Generate suggested tasks
     tasks = [
         {
             "title": f"Breed {p['doe_tag']} to {p['buck_tag']}",
-            "due_date": date.today().isoformat(),
+            "due_date": today.isoformat(),
             "assigned_to": "breeding",
             "rabbit_tag": p["doe_tag"],
             "status": "todo",
@@ -310,72 +460,107 @@ def breeding_plan(params: app_schemas.BreedingPlanInput):
 
 
 # Health/Doctor Agent - simple symptom checker
-@app.post("/agents/health/check")
-def symptom_check(payload: app_schemas.SymptomCheck):
-    symptoms = {s.strip().lower() for s in payload.symptoms if s.strip()}
+# Treat "head-tilt" / "runny_nose" like their spaced forms
+_SYMPTOM_SEPARATORS = str.maketrans("-_", "  ")
+
+
+class _SymptomRule(NamedTuple):
+    match_any: FrozenSet[str]
+    condition: str
+    severity: str
+    actions: Tuple[str, ...]
+    tips: Tuple[str, ...]
+
+
+# Rule table is constant; build it once at import
+_SYMPTOM_RULES = (
+    _SymptomRule(
+        match_any=frozenset({"diarrhea", "runny stool"}),
+        condition="Enteritis/Diarrhea",
+        severity="medium",
+        actions=(
+            "Isolate affected rabbit and ensure hydration",
+            "Remove fresh greens; offer hay and water",
+            "Consult vet for antidiarrheals if severe or persistent",
+        ),
+        tips=("Monitor stool consistency and appetite daily",),
+    ),
+    _SymptomRule(
+        match_any=frozenset({"head tilt", "nystagmus", "loss of balance"}),
+        condition="Possible E. cuniculi or inner ear infection",
+        severity="high",
+        actions=(
+            "Seek veterinary evaluation promptly",
+            "Minimize stress and provide safe padded area",
+        ),
+        tips=("Record onset time and any trauma history",),
+    ),
+    _SymptomRule(
+        match_any=frozenset({"sneezing", "nasal discharge", "runny nose"}),
+        condition="Upper respiratory signs",
+        severity="medium",
+        actions=(
+            "Check environment (dust, ammonia, drafts)",
+            "Consult vet; avoid penicillins orally in rabbits",
+        ),
+        tips=("Track temperature and breathing effort",),
+    ),
+    _SymptomRule(
+        match_any=frozenset({"not eating", "anorexia", "no feces", "bloat"}),
+        condition="GI stasis",
+        severity="high",
+        actions=(
+            "Urgent vet care if severe; encourage hydration",
+            "Provide safe warmth and gentle tummy massage if trained",
+        ),
+        tips=("Log fecal output and weight every 12h",),
+    ),
+    _SymptomRule(
+        match_any=frozenset({"mites", "itching", "flaky skin", "crusty ears"}),
+        condition="Parasites (fur/ear mites)",
+        severity="low",
+        actions=(
+            "Topical ivermectin or selamectin per vet guidance",
+            "Clean environment; treat in-contact rabbits",
+        ),
+        tips=("Recheck in 7-14 days",),
+    ),
+)
 
-    rules = [
-        {
-            "match_any": {"diarrhea", "runny stool"},
-            "condition": "Enteritis/Diarrhea",
-            "severity": "medium",
-            "actions": [
-                "Isolate affected rabbit and ensure hydration",
-                "Remove fresh greens; offer hay and water",
-                "Consult vet for antidiarrheals if severe or persistent",
-            ],
-            "tips": ["Monitor stool consistency and appetite daily"],
-        },
-        {
-            "match_any": {"head tilt", "nystagmus", "loss of balance"},
-            "condition": "Possible E. cuniculi or inner ear infection",
-            "severity": "high",
-            "actions": [
-                "Seek veterinary evaluation promptly",
-                "Minimize stress and provide safe padded area",
-            ],
-            "tips": ["Record onset time and any trauma history"],
-        },
-        {
-            "match_any": {"sneezing", "nasal discharge", "runny nose"},
-            "condition": "Upper respiratory signs",
-            "severity": "medium",
-            "actions": [
-                "Check environment (dust, ammonia, drafts)",
-                "Consult vet; avoid penicillins orally in rabbits",
-            ],
-            "tips": ["Track temperature and breathing effort"],
-        },
-        {
-            "match_any": {"not eating", "anorexia", "no feces", "bloat"},
-            "condition": "GI stasis",
-            "severity": "high",
-            "actions": [
-                "Urgent vet care if severe; encourage hydration",
-                "Provide safe warmth and gentle tummy massage if trained",
-            ],
-            "tips": ["Log fecal output and weight every 12h"],
-        },
-        {
-            "match_any": {"mites", "itching", "flaky skin", "crusty ears"},
-            "condition": "Parasites (fur/ear mites)",
-            "severity": "low",
-            "actions": [
-                "Topical ivermectin or selamectin per vet guidance",
-                "Clean environment; treat in-contact rabbits",
-            ],
-            "tips": ["Recheck in 7-14 days"],
-        },
-    ]
+
+def _build_symptom_masks() -> Tuple[Dict[str, int], Tuple[Tuple[int, _SymptomRule], ...]]:
+    bits: Dict[str, int] = {}
+    for rule in _SYMPTOM_RULES:
+        for symptom in sorted(rule.match_any):
+            bits.setdefault(symptom, 1 << len(bits))
+    masks = []
+    for rule in _SYMPTOM_RULES:
+        mask = 0
+        for symptom in rule.match_any:
+            mask |= bits[symptom]
+        masks.append((mask, rule))
+    return bits, tuple(masks)
+
+
+# Give each known symptom a bit so rule matching is one AND per rule
+_SYMPTOM_BIT, _RULE_MASKS = _build_symptom_masks()
+
+
+@app.post("/agents/health/check")
+async def symptom_check(payload: app_schemas.SymptomCheck):
+    symptoms = {norm for s in payload.symptoms if (norm := s.translate(_SYMPTOM_SEPARATORS).strip().lower())}
 
     findings: List[Dict[str, Any]] = []
-    for rule in rules:
-        if symptoms & rule["match_any"]:
+    reported = 0
+    for s in symptoms:
+        reported |= _SYMPTOM_BIT.get(s, 0)
+    for mask, rule in _RULE_MASKS:
+        if mask & reported:
             findings.append({
-                "condition": rule["condition"],
-                "severity": rule["severity"],
-                "immediate_actions": rule["actions"],
-                "monitoring_tips": rule["tips"],
+                "condition": rule.condition,
+                "severity": rule.severity,
+                "immediate_actions": rule.actions,
+                "monitoring_tips": rule.tips,
             })
 
     overall_severity = "low"
@@ -387,20 +572,22 @@ def symptom_check(payload: app_schemas.SymptomCheck):
     # Optional: attach recent health history
     history: List[Dict[str, Any]] = []
     if payload.rabbit_tag:
-        hist_docs = get_documents(collection_name(app_schemas.HealthRecord), {"rabbit_tag": payload.rabbit_tag}, limit=10)
-        history = to_dict_list(hist_docs)
+        history = await get_documents(_COLL[app_schemas.HealthRecord], {"rabbit_tag": payload.rabbit_tag}, limit=10)
 
-    return {
+    # Return the response directly so stored documents in history share the list endpoints' encoding
+    return MongoJSONResponse({
         "rabbit_tag": payload.rabbit_tag,
         "reported_symptoms": list(symptoms),
         "probable_conditions": findings,
         "overall_severity": overall_severity,
         "history": history,
         "disclaimer": "This is guidance only and not a diagnosis. Consult a veterinarian.",
-    }
+    })
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+    # Multiple workers need an import string rather than the app object
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="uvloop", http="httptools")